@@ -36,8 +36,8 @@ import atexit
 import json
 import traceback as tb
 from io import BytesIO
-from queue import Queue
-from threading import current_thread, main_thread
+from queue import Queue, Empty
+from threading import Thread, current_thread, main_thread
 
 import soar.hooks
 from soar import __version__
@@ -52,34 +52,71 @@ from soar.sim.world import *
 
 MAIN_THREAD = main_thread()  # Defines the main thread for later comparisons
 
-brain = None
-brain_path = None
 __module_paths = []
-__brain_modules = []
-world = None
-world_path = None
-__world_modules = []
-robot = None
-controller = None
-gui = None
-logfile = None
-step_duration = 0.1
-realtime = True
-options = None
-plots = []
-queue = Queue()
+__code_cache = {}  # Maps absolute module paths to (mtime, size, code object) tuples
+
+
+class ClientState:
+    """ The state of the client, shared by all of the futures it executes.
+
+    Attributes:
+        brain: The namespace of the currently loaded brain, or `None`.
+        brain_path: The path of the currently loaded brain, or `None`.
+        brain_modules (list): The names of any modules loaded by the brain.
+        world: The currently loaded :class:`soar.sim.world.World`, or `None`.
+        world_path: The path of the currently loaded world, or `None`.
+        world_modules (list): The names of any modules loaded by the world.
+        robot: The robot defined by the currently loaded brain, or `None`.
+        controller: The current :class:`soar.controller.Controller`, or `None`.
+        gui: The :class:`soar.gui.soar_ui.SoarUI` instance, or `None` if running headless.
+        logfile: The path or file-like object to log to, or `None`.
+        log_fd: The persistent file descriptor used when `logfile` is a path, or `None`.
+        log_queue: The bounded queue of serialized log objects waiting to be written to `log_fd`, or `None`.
+        log_writer: The thread writing the contents of `log_queue` to `log_fd`, or `None`.
+        log_error: The message of the last error the log writer encountered, or `None`.
+        step_duration (float): The duration of a controller step, in seconds.
+        realtime (bool): Whether the controller sleeps to make steps last `step_duration`.
+        options (dict): The keyword arguments to pass to the robot whenever it is loaded, or `None`.
+        plots (list): Any `PlotWindow` objects created by the current brain.
+        queue: The queue of futures for the client to execute.
+    """
+    __slots__ = ('brain', 'brain_path', 'brain_modules', 'world', 'world_path', 'world_modules', 'robot', 'controller',
+                 'gui', 'logfile', 'log_fd', 'log_queue', 'log_writer', 'log_error', 'step_duration', 'realtime',
+                 'options', 'plots', 'queue')
+
+    def __init__(self):
+        self.brain = None
+        self.brain_path = None
+        self.brain_modules = []
+        self.world = None
+        self.world_path = None
+        self.world_modules = []
+        self.robot = None
+        self.controller = None
+        self.gui = None
+        self.logfile = None
+        self.log_fd = None
+        self.log_queue = None
+        self.log_writer = None
+        self.log_error = None
+        self.step_duration = 0.1
+        self.realtime = True
+        self.options = None
+        self.plots = []
+        self.queue = Queue()
+
+
+state = ClientState()
 
 
 def empty_queue():  # Empty the queue
-    global queue
-    while not queue.empty():
-        _ = queue.get()
-        queue.task_done()
+    while not state.queue.empty():
+        _ = state.queue.get()
+        state.queue.task_done()
 
 
 def tkinter_execute(func, after_idle=False):  # Run functions on Tk's main thread, synchronously
     def tk_wrap(*args, **kwargs):
-        global gui, MAIN_THREAD
         if current_thread() != MAIN_THREAD:  # Only force Tk to call the function if not already on the main thread
             def return_exceptions(*args, **kwargs):  # Force a function to return any exception it raises
                 try:
@@ -88,7 +125,7 @@ def tkinter_execute(func, after_idle=False):  # Run functions on Tk's main threa
                     return e
                 else:
                     return return_val
-            return_val = gui.synchronous_future(return_exceptions, *args, after_idle=after_idle, **kwargs)
+            return_val = state.gui.synchronous_future(return_exceptions, *args, after_idle=after_idle, **kwargs)
             if isinstance(return_val, Exception):  # If the function returned an exception, raise it
                 raise return_val
             return return_val
@@ -126,23 +163,81 @@ def catch_exceptions(func):  # Catch exceptions that occur and notify the client
 def log(obj, mode='a'):
     """ Log a serialized JSON object to a path or file-like object, adding a newline after.
 
+    If the logfile is a path, it is opened once and kept open as a raw file descriptor in append mode, rather than
+    being reopened for every object logged. The object is serialized immediately, but written to the file by a
+    background thread, so that disk writes do not stall the controller.
+
     Args:
         obj: The object to be serialized.
-        mode: The mode in which the file is to be opened.
+        mode: The mode in which the file is to be opened. Passing `'w'` truncates the file and reopens it.
     """
-    global logfile
     # Recast any write errors as Soar errors
-    if hasattr(logfile, 'write'):  # Try and treat logfile as a file-like object that has been opened
+    if hasattr(state.logfile, 'write'):  # Try and treat logfile as a file-like object that has been opened
         try:
-            logfile.write(json.dumps(obj) + '\n')
+            state.logfile.write(json.dumps(obj) + '\n')
         except Exception as e:
             raise LoggingError(str(e))
-    else:  # Otherwise treat it as a path, and open it
+    else:  # Otherwise treat it as a path, and open it if it isn't already
+        if state.log_error is not None:  # Report any error from the log writer
+            raise LoggingError(state.log_error)
         try:
-            with open(logfile, mode) as f:
-                f.write(json.dumps(obj) + '\n')
+            if state.log_fd is None or mode == 'w':
+                close_log()
+                flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+                if mode == 'w':
+                    flags |= os.O_TRUNC
+                state.log_fd = os.open(state.logfile, flags, 0o644)
+                state.log_queue = Queue(maxsize=1024)
+                state.log_writer = Thread(target=log_writer, args=(state.log_fd, state.log_queue), daemon=True)
+                state.log_writer.start()
         except (OSError, IOError) as e:
             raise LoggingError(str(e))
+        state.log_queue.put((json.dumps(obj) + '\n').encode())  # Only blocks if the writer falls far behind
+
+
+def log_writer(fd, queue):  # Write serialized objects from the queue to the logfile descriptor, until None is received
+    done = False
+    while not done:
+        chunks = [queue.get()]
+        try:  # Write everything that is already waiting at once
+            while True:
+                chunks.append(queue.get_nowait())
+        except Empty:
+            pass
+        if chunks[-1] is None:
+            chunks.pop()
+            done = True
+        if state.log_error is None:  # After an error, keep emptying the queue so that log() never blocks
+            try:
+                os.write(fd, b''.join(chunks))
+            except OSError as e:
+                state.log_error = str(e)
+
+
+def close_log():  # Finish writing and close the logfile descriptor, if one is open, raising any pending write error
+    if state.log_writer is not None:
+        state.log_queue.put(None)
+        state.log_writer.join()
+        state.log_writer = state.log_queue = None
+    if state.log_fd is not None:
+        try:
+            os.close(state.log_fd)
+        except OSError:  # Ignore errors; the descriptor is unusable either way
+            pass
+        state.log_fd = None
+    error, state.log_error = state.log_error, None
+    if error is not None:  # The writer failed after the last call to log() checked, so report it now
+        raise LoggingError(error)
+
+
+def close_log_at_exit():  # Close the log at program exit, reporting rather than raising any final write error
+    try:
+        close_log()
+    except LoggingError as e:
+        printerr('LoggingError: ' + str(e))
+
+
+atexit.register(close_log_at_exit)  # Make sure anything still queued reaches the logfile
 
 
 def future(name, *args, **kwargs):
@@ -158,11 +253,22 @@ def future(name, *args, **kwargs):
         *args: The variable length arguments to pass to the function.
         **kwargs: The keyword arguments to pass to the function.
     """
-    global queue
-    queue.put((name, args, kwargs))
+    state.queue.put((name, args, kwargs))
+
+
+def compile_module(path):  # Compile a module's source, reusing the code object if it is unchanged
+    stat = os.stat(path)
+    cached = __code_cache.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(path, 'r') as f:
+        code_object = compile(f.read(), path, 'exec')
+    __code_cache[path] = (stat.st_mtime_ns, stat.st_size, code_object)
+    return code_object
 
 
 # Loads a module from a path and returns its namespace, as well as any modules it loaded, as a list
+# The module is always executed in a fresh namespace, but its source is only recompiled if it changed
 def load_module(path, namespace=None):
     global __module_paths
     if namespace is None:
@@ -178,7 +284,7 @@ def load_module(path, namespace=None):
     try:
         __module_paths.append(module_dir)
         sys.path.append(module_dir)
-        code_object = compile(open(path, 'r').read(), path, 'exec')
+        code_object = compile_module(path)
         exec(code_object, namespace)  # Execute the module in an isolated namespace
     except Exception as e:  # Unload any loaded modules if, say, a syntax error occurred during load
         loaded = [modname for modname in sys.modules if modname not in before_load]  # List the modules that were loaded
@@ -205,28 +311,26 @@ def load_module(path, namespace=None):
 
 
 def brain_setup():  # Setup a freshly loaded brain by wrapping the necessary methods
-    global brain, gui, logfile, plots
     force_main_thread = False  # If this gets set to True, brain methods must run in the main thread
 
     # If the brain uses Tkinter and we're running in GUI mode, force brain methods to run in the main thread
-    if gui and 'tkinter_hook' in brain:
+    if state.gui and 'tkinter_hook' in state.brain:
         force_main_thread = True
 
     # Clear any plot objects that may have been listed by any previously loaded brain
-    plots = []
+    state.plots = []
 
     # Wrap brain methods, running them in Tk's thread if necessary
     for func in ['on_load', 'on_start', 'on_step', 'on_stop', 'on_shutdown']:
-        if func in brain and callable(brain[func]):
+        if func in state.brain and callable(state.brain[func]):
             if force_main_thread:  # We hack a bit to run methods on the Tk thread, even when called from any thread
-                brain[func] = tkinter_execute(brain[func])
+                state.brain[func] = tkinter_execute(state.brain[func])
         else:  # Make undefined functions do nothing
-            brain[func] = lambda *args, **kwargs: None
+            state.brain[func] = lambda *args, **kwargs: None
 
 
 def log_all_plots():  # Log any PlotWindow objects to the logfile. Use with caution.
-    global plots
-    for p in filter(lambda p: not p._destroyed, plots):  # Every plot that has not been destroyed
+    for p in filter(lambda p: not p._destroyed, state.plots):  # Every plot that has not been destroyed
         image_bytes = BytesIO()
         p.save(image_bytes, format='png')
         log({'type': 'plot', 'data': image_bytes.getvalue().hex()})
@@ -245,20 +349,19 @@ def nop(*args, callback=None, **kwargs):  # A NOP, typically used for callbacks
 
 
 def set_hooks(*args, **kwargs):  # Set the hooks that must be defined before a brain is ever loaded
-    global gui, plots, MAIN_THREAD
     hooks = soar.hooks
 
     # Give the brain access to the mode soar is running in
-    hooks.is_gui = lambda: gui is not None
+    hooks.is_gui = lambda: state.gui is not None
 
     # First make sure all calls to PlotWindow use Toplevel() rather than Tk()
     PlotWindow._tk_started = True
 
     # Wrap PlotWindow, ensuring it plays nicely with Soar and Tk
     # This includes keeping track of open plots, attaching the window to the UI, and wrapping class methods
-    plots = []
+    state.plots = []
     class WrappedPlotWindow(PlotWindow):
-        if gui:
+        if state.gui:
             def __init__(self, title='Plotting Window', visible=True):
                 # Wrap the class init so that it runs in the Tk mainloop
                 if current_thread() != MAIN_THREAD:  # If not on the main thread, force it
@@ -266,8 +369,8 @@ def set_hooks(*args, **kwargs):  # Set the hooks that must be defined before a b
                 else:  # If we're already on the main thread, do a normal init
                     PlotWindow.__init__(self, title, visible=visible)
                 # Attach the window to the UI, and add it to the list of plots
-                gui.attach_window(self)
-                plots.append(self)
+                state.gui.attach_window(self)
+                state.plots.append(self)
 
             def __getattribute__(self, name):
                 if current_thread() != MAIN_THREAD:  # If not on the main thread
@@ -283,15 +386,15 @@ def set_hooks(*args, **kwargs):  # Set the hooks that must be defined before a b
             def __init__(self, title='Plotting Window', visible=True):
                 # Ensure the window is not visible, and add the plot to the global list
                 PlotWindow.__init__(self, title, visible=False)
-                plots.append(self)
+                state.plots.append(self)
     sys.modules['soar.gui.plot_window'].PlotWindow = WrappedPlotWindow
 
     # Set the Tkinter hook to attach windows to the GUI
-    if gui:
-        hooks.tkinter_hook = gui.attach_window
+    if state.gui:
+        hooks.tkinter_hook = state.gui.attach_window
 
     # Set the Tkinter wrap to execute widget callables on the Tk mainloop
-    if gui:
+    if state.gui:
         def tk_wrap(widget, linked=True):
             methods = [func for func in dir(widget) if callable(getattr(widget, func)) and not func.startswith('__')]
             for func_name in methods:
@@ -302,24 +405,22 @@ def set_hooks(*args, **kwargs):  # Set the hooks that must be defined before a b
 
 
 def make_gui(*args, **kwargs):  # Creates the GUI and enters the main UI loop
-    global gui
-    gui = SoarUI(client_future=future, client_mainloop=mainloop)
-    gui.mainloop()  # Enter the Tk event loop, which only ends when the GUI closes
+    state.gui = SoarUI(client_future=future, client_mainloop=mainloop)
+    state.gui.mainloop()  # Enter the Tk event loop, which only ends when the GUI closes
     return True  # Exit client mainloop after GUI closes
 
 
 def load_brain(path, *args, callback=None, silent=False, **kwargs):  # Loads a brain file, optionally calling a callback
-    global brain, brain_path, robot, gui, __brain_modules, options
-    brain_path = path
-    for modname in __brain_modules:  # Try and delete previously loaded modules
+    state.brain_path = path
+    for modname in state.brain_modules:  # Try and delete previously loaded modules
         try:
             del sys.modules[modname]
         except KeyError:  # Assume if there is a KeyError that the module no longer exists
             pass
-    brain, __brain_modules = load_module(brain_path)
-    robot = brain['robot']
-    if options is not None:
-        robot.set_robot_options(**options)  # Set the robot options
+    state.brain, state.brain_modules = load_module(state.brain_path)
+    state.robot = state.brain['robot']
+    if state.options is not None:
+        state.robot.set_robot_options(**state.options)  # Set the robot options
     brain_setup()
     if not silent:
         print('LOAD BRAIN:', path)
@@ -328,15 +429,14 @@ def load_brain(path, *args, callback=None, silent=False, **kwargs):  # Loads a b
 
 
 def load_world(path, *args, callback=None, silent=False, **kwargs):  # Loads a world file, optionally calling a callback
-    global world, world_path, __world_modules
-    world_path = path
-    for modname in __world_modules:  # Try and delete previously loaded modules
+    state.world_path = path
+    for modname in state.world_modules:  # Try and delete previously loaded modules
         try:
             del sys.modules[modname]
         except KeyError:  # Assume if there is a KeyError that the module no longer exists
             pass
-    world, __world_modules = load_module(world_path)
-    world = world['world']  # Grab the actual world object, not the module
+    state.world, state.world_modules = load_module(state.world_path)
+    state.world = state.world['world']  # Grab the actual world object, not the module
     if not silent:
         print('LOAD WORLD:', path)
     if callback:
@@ -344,151 +444,148 @@ def load_world(path, *args, callback=None, silent=False, **kwargs):  # Loads a w
 
 
 def gui_load_brain(path, *args, **kwargs):  # Simulates loading a brain through the GUI
-    global gui
-    gui.future(gui.loading)
-    gui.brain_path = os.path.abspath(path)
-    load_brain(os.path.abspath(path), callback=lambda: gui.future(gui.brain_ready))
+    state.gui.future(state.gui.loading)
+    state.gui.brain_path = os.path.abspath(path)
+    load_brain(os.path.abspath(path), callback=lambda: state.gui.future(state.gui.brain_ready))
 
 
 def gui_load_world(path, *args, **kwargs):  # Simulates loading a world through the GUI
-    global gui
-    gui.future(gui.loading)
-    gui.world_path = os.path.abspath(path)
-    load_world(os.path.abspath(path), callback=lambda: gui.future(gui.world_ready))
+    state.gui.future(state.gui.loading)
+    state.gui.world_path = os.path.abspath(path)
+    load_world(os.path.abspath(path), callback=lambda: state.gui.future(state.gui.world_ready))
 
 
 def make_controller(*args, simulated=True, callback=None, **kwargs):  # Makes the controller and loads it
-    global robot, brain, brain_path, world, world_path, controller, gui, logfile, step_duration, realtime
-    if logfile:  # Write initial meta information to file
-        log({'type': 'meta', 'simulated': simulated, 'version': __version__, 'brain': os.path.abspath(brain_path),
-             'world': os.path.abspath(world_path)}, mode='w')
+    if state.logfile:  # Write initial meta information to file
+        log({'type': 'meta', 'simulated': simulated, 'version': __version__,
+             'brain': os.path.abspath(state.brain_path), 'world': os.path.abspath(state.world_path)}, mode='w')
         controller_log = log
     else:
         controller_log = None
-    controller = Controller(client_future=future, robot=robot, brain=brain, world=world, simulated=simulated, gui=gui,
-                            step_duration=step_duration, realtime=realtime, log=controller_log)
-    wrap_attrs(controller, ['load', 'run', 'step_thread', 'stop', 'shutdown'])
+    state.controller = Controller(client_future=future, robot=state.robot, brain=state.brain, world=state.world,
+                                  simulated=simulated, gui=state.gui, step_duration=state.step_duration,
+                                  realtime=state.realtime, log=controller_log)
+    wrap_attrs(state.controller, ['load', 'run', 'step_thread', 'stop', 'shutdown'])
     if not simulated:  # If working with a real robot, register its shutdown to be called at exit
-        atexit.register(shutdown_robot, robot)
-    if controller.load() == EXCEPTION:
+        atexit.register(shutdown_robot, state.robot)
+    if state.controller.load() == EXCEPTION:
         return
     if callback:
         callback()
 
 
 def make_world_canvas(world, *args, callback=None, **kwargs):  # Builds the canvas in the gui
-    global gui
-    if gui:
-        gui.future(gui.make_world_canvas, world, callback=callback)
+    if state.gui:
+        state.gui.future(state.gui.make_world_canvas, world, callback=callback)
 
 
 def draw(obj, *args, **kwargs):  # Draws one or more objects by placing them on the UI's draw queue
-    global gui
-    gui.future(gui.draw, obj)
+    state.gui.queue_draw(obj)
 
 
 def start_controller(*args, callback=None, **kwargs):
-    global controller, gui
-    if controller:
-        if controller.run() == EXCEPTION:
+    if state.controller:
+        if state.controller.run() == EXCEPTION:
             return
     if callback:
         callback()
 
 
-def pause_controller(*args, callback=None, **kwargs):
-    global controller
-    if controller:
-        controller.pause()
+def pause_controller(*args, callback=None, controller=None, **kwargs):
+    if controller is not None and controller is not state.controller:  # A retry for a controller since replaced
+        return
+    if state.controller:
+        # Don't block the mainloop on a long step; if the step thread hasn't stopped yet, try again in the future
+        # The timeout has a floor, so that a zero or tiny step duration doesn't turn this into a busy loop
+        if not state.controller.pause(timeout=max(3*state.controller.step_duration, 0.05)):
+            future(PAUSE_CONTROLLER, callback=callback, controller=state.controller)
+            return
     if callback:
         callback()
 
 
 def step_controller(n, *args, **kwargs):
-    global controller
-    if controller:
-        controller.run(n=n)
+    if state.controller:
+        state.controller.run(n=n)
 
 
 def step_finished(*args, **kwargs):
-    global gui, controller
-    if gui:  # If there is a gui, notify it that the steps have completed.
-        if controller and not controller.stopped:  # However only do so if the controller has not stopped.
-            gui.future(gui.step_finished)
+    if state.gui:  # If there is a gui, notify it that the steps have completed.
+        if state.controller and not state.controller.stopped:  # However only do so if the controller has not stopped.
+            state.gui.future(state.gui.step_finished)
     else:  # Break out of the mainloop after the steps have finished
         return True
 
 
 def stop_controller(*args, callback=None, **kwargs):
-    global controller
-    if controller:
-        if controller.stop() == EXCEPTION:
+    if state.controller:
+        if state.controller.stop() == EXCEPTION:
             return
     if callback:
         callback()
 
 
 def shutdown_controller(*args, **kwargs):
-    global controller, logfile
-    if controller:
-        controller.shutdown()
-        if logfile:  # Log any plots that were created
+    if state.controller:
+        state.controller.shutdown()
+        if state.logfile:  # Log any plots that were created
             log_all_plots()
         atexit.unregister(shutdown_robot)
-    controller = None
+    try:
+        close_log()
+    except LoggingError as e:  # Report the final write error like any other logging error
+        printerr('LoggingError: ' + str(e))
+        future(LOGGING_ERROR)
+    finally:
+        state.controller = None
 
 
 def logging_error(*args, **kwargs):  # Called when a LoggingError occurs
-    global gui
-    if not gui:  # Quit out of the mainloop if not running in GUI mode
+    if not state.gui:  # Quit out of the mainloop if not running in GUI mode
         raise SoarError('Unable to handle logging errors in headless mode')
 
 
 def gui_error(*args, **kwargs):
-    global gui
-    if gui:
-        gui.future(gui.gui_error)
+    if state.gui:
+        state.gui.future(state.gui.gui_error)
     else:
         raise SoarError('GUIErrors should not occur in headless mode')
 
 
 def controller_io_error(*args, **kwargs):  # Called after a SoarIOError occurs
-    global brain, brain_path, world, world_path, robot, gui
-    if gui:
-        gui.future(gui.controller_io_error)
+    if state.gui:
+        state.gui.future(state.gui.controller_io_error)
     else:  # Err out of the mainloop
         raise SoarError('Unable to handle SoarIOError in headless mode')
 
 
 def controller_failure(*args, **kwargs):  # The controller has failed in an unanticipated way
-    global controller
     empty_queue()  # Empty the client queue
-    if controller:
-        controller.failure()
-    if gui:
-        gui.future(gui.controller_failure)
+    if state.controller:
+        state.controller.failure()
+    if state.gui:
+        state.gui.future(state.gui.controller_failure)
         atexit.unregister(shutdown_robot)  # No need to shut down the robot at exit anymore
     else:
         raise SoarError('Unable to handle controller failures in headless mode')
 
 
 def controller_complete(*args, **kwargs):  # Called when the simulation has completed
-    global gui, controller, logfile, brain
-    if controller:
-        if controller.stop() == EXCEPTION:
+    if state.controller:
+        if state.controller.stop() == EXCEPTION:
             return
-        if gui:
-            gui.future(gui.stop_ready)
-        if controller.shutdown() == EXCEPTION:
+        if state.gui:
+            state.gui.future(state.gui.stop_ready)
+        if state.controller.shutdown() == EXCEPTION:
             return
-        print('Simulation completed in', round(controller.elapsed, 3), '(simulated) seconds.')
-        if logfile:
+        print('Simulation completed in', round(state.controller.elapsed, 3), '(simulated) seconds.')
+        if state.logfile:
             if len(args) > 0 and args[0]:  # Log an object passed to sim_completed
                 log(args[0])
-            if 'PlotWindow' in brain:  # Log any plot window objects
+            if 'PlotWindow' in state.brain:  # Log any plot window objects
                 log_all_plots()
-            log({'type': 'meta', 'completed': controller.elapsed})
-        if not gui:  # Prepare to quit out of the mainloop if no gui
+            log({'type': 'meta', 'completed': state.controller.elapsed})
+        if not state.gui:  # Prepare to quit out of the mainloop if no gui
             return True
 
 
@@ -524,14 +621,14 @@ future_map = {MAKE_GUI: make_gui,
 
 
 def mainloop():
-    global gui
+    get = state.queue.get  # Bound once, rather than looked up for every future
     while True:
-        name, args, kwargs = queue.get()
-        try:
+        name, args, kwargs = get()
+        try:  # An unknown future name raises a KeyError, which is reported like any other failure
             quit_loop = future_map[name](*args, **kwargs)
         except Exception as e:  # Catch any unhandled exceptions
             tb.print_exc()
-            if gui:  # If there is a GUI, treat the exception as non-fatal and signal a controller failure
+            if state.gui:  # If there is a GUI, treat the exception as non-fatal and signal a controller failure
                 controller_failure()
             else:  # Otherwise, return and signify an error
                 return 1
@@ -539,7 +636,7 @@ def mainloop():
             if quit_loop:  # If a function returns true, end the loop and complete
                 return 0
         finally:
-            queue.task_done()
+            state.queue.task_done()
 
 
 def main(brain_path=None, world_path=None, headless=False, logfile=None, step_duration=0.1, realtime=True,
@@ -559,11 +656,10 @@ def main(brain_path=None, world_path=None, headless=False, logfile=None, step_du
     Returns:
         0 if Soar's execution successfully completed, 1 otherwise.
     """
-    global robot
-    globals()['logfile'] = logfile
-    globals()['step_duration'] = step_duration
-    globals()['realtime'] = realtime
-    globals()['options'] = options
+    state.logfile = logfile
+    state.step_duration = step_duration
+    state.realtime = realtime
+    state.options = options
     if headless:
         future(SET_HOOKS)
         if brain_path and world_path:
@@ -582,6 +678,12 @@ def main(brain_path=None, world_path=None, headless=False, logfile=None, step_du
         if world_path:
             future(GUI_LOAD_WORLD, world_path)
     return_val = mainloop()
-    shutdown_robot(robot)
+    try:
+        close_log()
+    except LoggingError as e:  # The last log writes failed, so report the error and signify failure
+        printerr('LoggingError: ' + str(e))
+        return_val = 1
+    finally:  # Shut down the robot even if the last log writes failed
+        shutdown_robot(state.robot)
     atexit.unregister(shutdown_robot)  # No need to shut down the robot at program exit anymore, since we're done
     return return_val
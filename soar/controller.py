@@ -3,14 +3,70 @@
 #
 # soar/controller.py
 """ Controller classes and functions for controlling robots, simulated or real. """
-from io import StringIO
-from threading import Thread
-from time import sleep
-from timeit import default_timer as timer
+import os
+import sys
+from threading import Thread, Event, get_ident, current_thread
+from time import sleep, monotonic, perf_counter
 
 from soar.common import DRAW, CONTROLLER_COMPLETE, STEP_FINISHED, MAKE_WORLD_CANVAS, EXCEPTION
 
 
+def _make_sleep_until():
+    """ Return a function that sleeps until an absolute :func:`time.monotonic` deadline.
+
+    On Linux this blocks with `clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, ...)`, which wakes at the deadline itself
+    rather than after a relative interval, so sleeps do not accumulate drift. Elsewhere, it falls back to
+    :func:`time.sleep`.
+    """
+    def sleep_until(deadline):
+        remaining = deadline - monotonic()
+        if remaining > 0:
+            sleep(remaining)
+
+    if not sys.platform.startswith('linux'):  # The clock id and flag values below are Linux-specific
+        return sleep_until
+    try:
+        import ctypes
+        clock_nanosleep = ctypes.CDLL(None).clock_nanosleep  # Resolved from the C library Python is linked against
+    except (ImportError, OSError, AttributeError):
+        return sleep_until
+
+    class Timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    CLOCK_MONOTONIC, TIMER_ABSTIME, EINTR = 1, 1, 4
+    clock_nanosleep.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(Timespec), ctypes.POINTER(Timespec)]
+    clock_nanosleep.restype = ctypes.c_int
+
+    def clock_sleep_until(deadline):
+        secs = int(deadline)
+        ts = Timespec(secs, int((deadline - secs) * 1e9))
+        while clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, ctypes.byref(ts), None) == EINTR:
+            pass  # Interrupted by a signal, so keep sleeping until the same deadline
+    return clock_sleep_until
+
+
+def _sleep_until(deadline):
+    """ Sleep until an absolute :func:`time.monotonic` deadline.
+
+    The first call builds the real implementation with :func:`_make_sleep_until` and replaces this function with it, so
+    that importing the module does not load ctypes.
+    """
+    global _sleep_until
+    _sleep_until = _make_sleep_until()
+    _sleep_until(deadline)
+
+
+def _pin_step_thread():
+    """ Pin the calling thread to one of the cores the process is allowed to run on, if supported. """
+    try:
+        allowed = sorted(os.sched_getaffinity(0))
+        if len(allowed) > 1:  # Otherwise already pinned, or there is nothing to choose from
+            os.sched_setaffinity(0, {allowed[-1]})
+    except (AttributeError, OSError):  # Affinity is unsupported on this platform
+        pass
+
+
 class Controller:
     """ A class for interacting with simulated or real robots.
 
@@ -56,22 +112,25 @@ class Controller:
         self.stopped = False
         self.elapsed = 0.0
         self.step_count = 0
-        self._step_thread = None
-        self._avg_offset = 0.0
-        self._brain_log_contents = StringIO()
+        self._step_thread = None  # A persistent worker thread that runs steps, started on the next multi-step run
+        self._run_event = None  # Set to wake the worker thread, either to run steps or to exit
+        self._run_n = None  # The number of steps the worker thread should run when woken
+        self._thread_ident = None  # The identifier of the running step thread, if any
+        self._stopped_event = Event()  # Set whenever no step thread is running
+        self._stopped_event.set()
+        self._brain_log_chunks = []  # Anything the brain printed since the last logged step
+        self._step_log = {'type': 'step', 'elapsed': 0.0, 'step': 0, 'robot': None}
+        # The step methods, bound once rather than looked up on every step. If simulating, the world will handle the
+        # robot's step, otherwise the robot is stepped on its own
+        self._brain_step = brain['on_step']
+        self._env_step = world.on_step if simulated else robot.on_step
+        self._needs_draw = bool(simulated and gui)  # Only a simulated world with a GUI is drawn after each step
+        self._draw_interval = 1.0/30  # The minimum number of seconds between draws, limiting redraws to 30 per second
+        self._last_draw = 0.0
 
     def load(self):
         """ Called when the controller is loaded. """
-        # Set brain print function
-        def brain_print(*args, **kwargs):
-            raw = kwargs.pop('raw', False)
-            if raw:  # Print without the three carets '>>>'
-                print(*args, **kwargs)
-            else:
-                print('>>>', *args, **kwargs)
-            if self.log:  # If logging, ensure anything printed is logged
-                print(*args, file=self._brain_log_contents, **kwargs)
-        self.brain['print'] = brain_print
+        self.brain['print'] = self._brain_print
 
         if 'elapsed' in self.brain:  # Give brain read-only access to the elapsed time
             self.brain['elapsed'] = lambda: self.elapsed
@@ -95,6 +154,22 @@ class Controller:
         # t.start()
         self.brain['on_load']()
 
+    def _brain_print(self, *args, **kwargs):  # Replaces print() in the brain
+        raw = kwargs.pop('raw', False)
+        sep, end = kwargs.pop('sep', None), kwargs.pop('end', None)
+        sep = ' ' if sep is None else sep
+        end = '\n' if end is None else end
+        # Format the line once, for both the output and the log
+        strs = [str(arg) for arg in args]
+        text = sep.join(strs) + end
+        out = text if raw else sep.join(['>>>'] + strs) + end  # Unless raw, prefix the three carets '>>>'
+        if kwargs:  # Fall back to print() to honor any file or flush arguments
+            print(out, end='', **kwargs)
+        else:
+            sys.stdout.write(out)  # Looked up on every call, since stdout may be redirected, for example by the GUI
+        if self.log:  # If logging, ensure anything printed is logged
+            self._brain_log_chunks.append(text)
+
     # def force_brain_crash(self):
     #     sleep(5.0)
     #     class Dummy:
@@ -125,72 +200,121 @@ class Controller:
         if n == 0:  # Don't do any steps
             return
         if n == 1:  # If we're just doing one step, no need to start a new thread
+            self._last_draw = 0.0  # Always draw the result of a single step
             step_time = self.single_step()
             if step_time < self.step_duration:  # Just add self.step_duration to the elapsed time
                 self.elapsed += self.step_duration
             else:  # If the step took longer than it should have, add its length to self.elapsed
                 self.elapsed += step_time
             self.client_future(STEP_FINISHED)
-        else:  # Otherwise let the step timer run the steps
-            self._step_thread = Thread(target=lambda: self.step_thread(n=n), daemon=True)
-            self._step_thread.start()
+        else:  # Otherwise let the step thread run the steps
+            self._stopped_event.clear()
+            self._run_n = n
+            if self._step_thread is None:  # Start a worker thread, which is reused for every later run until stopped
+                self._run_event = Event()
+                self._step_thread = Thread(target=self._step_worker, args=(self._run_event,), daemon=True)
+                self._step_thread.start()
+            self._run_event.set()
+
+    def _step_worker(self, run_event):  # Waits to be woken by run(), then runs steps, until it is stopped
+        while True:
+            run_event.wait()
+            run_event.clear()
+            if self._step_thread is not current_thread():  # This worker was stopped, and may have been replaced
+                return
+            self.step_thread(n=self._run_n)
+
+    def _stop_worker(self):  # Detach the worker thread, if any, and wake it so that it exits
+        if self._step_thread is not None:
+            self._step_thread = None
+            self._run_event.set()
 
     def step_thread(self, n=None):  # If n is unspecified, run forever until stopped.
         # step_thread is typically wrapped by the client so that any exceptions that occur are made known.
-        self.running = True
-        while self.running and (n is None or n > 0):
-            start = timer()  # Time the actual step, with sleeping included
-            step_time = self.single_step()
-            if step_time < self.step_duration:  # Just add self.step_duration to the elapsed time
-                self.elapsed += self.step_duration
-                if self.realtime:  # If running in real time, sleep accordingly
-                    sleep(max(0, self.step_duration-step_time-self._avg_offset))
-            else:  # If the step took longer than it should have, add its length to self.elapsed and don't sleep
-                self.elapsed += step_time
-            if n:  # If running for a specific number of steps, decrement
-                n -= 1
-            if self.realtime:  # If running in real time, try and figure out by how much the sleep was too long or short
-                real_step_duration = timer() - start
-                offset = real_step_duration - self.step_duration
-                self._avg_offset = 0.75 * self._avg_offset + 0.25 * offset  # Exponentially weighted moving average
-        if self.running:  # If the timer finished naturally, without being stopped, notify the client
+        self._thread_ident = get_ident()
+        if self.realtime:  # Pin the step thread to a single core, if possible, to keep its caches warm between steps
+            _pin_step_thread()
+        try:
+            self.running = True
+            # The timing math runs every step, so keep everything it touches in locals
+            step_duration, realtime, single_step = self.step_duration, self.realtime, self.single_step
+            deadline = monotonic()  # The absolute time at which the next step should begin
+            while self.running and (n is None or n > 0):
+                step_time = single_step()
+                if step_time < step_duration:  # Just add step_duration to the elapsed time
+                    self.elapsed += step_duration
+                else:  # If the step took longer than it should have, add its length to self.elapsed
+                    self.elapsed += step_time
+                if n:  # If running for a specific number of steps, decrement
+                    n -= 1
+                if realtime:  # If running in real time, sleep until the next step is due
+                    deadline += step_duration
+                    now = monotonic()
+                    if deadline > now:
+                        _sleep_until(deadline)
+                    else:  # If we've fallen behind, don't try to catch up by running steps back to back
+                        deadline = now
+            if self._needs_draw:  # Always draw the final step, in case it was skipped
+                self.client_future(DRAW, self.world)
+            finished = self.running  # If the timer finished naturally, without being stopped, notify the client
             self.running = False
+        finally:  # Always signal that the thread has stopped, even if the step raised
+            self._thread_ident = None
+            self._stopped_event.set()
+        # Only notify the client once the thread is marked as stopped, so that a run started in response can't have
+        # its cleared event set again by this one
+        if finished:
             self.client_future(STEP_FINISHED)
 
     def single_step(self):  # Undergoes a single step, returns the number of seconds the step took
         if self.log:  # Log information before the step to the log file
             self.log_step_info()
-        start = timer()
+        step_duration = self.step_duration
+        start = perf_counter()
         # First step the brain
-        self.brain['on_step'](self.step_duration)
+        self._brain_step(step_duration)
         # Measure how long the brain took. If it took longer, the robot and world should be stepped accordingly
-        brain_duration = timer()-start
-        if brain_duration > self.step_duration:
+        brain_duration = perf_counter()-start
+        if brain_duration > step_duration:
             step_duration = brain_duration
-        else:
-            step_duration = self.step_duration
-        if self.simulated:  # If simulating, the world will handle the robot's step
-            self.world.on_step(step_duration)
-            if self.gui:
+        # Then step the world or robot
+        self._env_step(step_duration)
+        if self._needs_draw:
+            now = perf_counter()
+            if now - self._last_draw >= self._draw_interval:  # Don't queue draws faster than the GUI can show them
+                self._last_draw = now
                 self.client_future(DRAW, self.world)
-        else:  # Otherwise step the robot on its own
-            self.robot.on_step(step_duration)
         self.step_count += 1
-        return timer()-start
+        return perf_counter()-start
 
     def log_step_info(self):
         """ Log information about the current step. """
-        log_object = {'type': 'step', 'elapsed': self.elapsed, 'step': self.step_count, 'robot': self.robot.to_dict()}
-        if self._brain_log_contents.getvalue() != '':
-            log_object.update({'brain_print': self._brain_log_contents.getvalue()})
-            self._brain_log_contents.truncate(0)
-            self._brain_log_contents.seek(0)
+        log_object = self._step_log  # Reused for every step, since the log serializes it immediately
+        log_object['elapsed'] = self.elapsed
+        log_object['step'] = self.step_count
+        log_object['robot'] = self.robot.to_dict()
+        if self._brain_log_chunks:
+            log_object['brain_print'] = ''.join(self._brain_log_chunks)
+            self._brain_log_chunks.clear()
+        else:
+            log_object.pop('brain_print', None)
         self.log(log_object)
 
-    def pause(self):  # Stops the currently running step thread, if it exists
+    def pause(self, timeout=None):
+        """ Stops the currently running step thread, if it exists.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait for the step thread to stop, or `None`
+                to wait indefinitely.
+
+        Returns:
+            bool: `True` if no step thread is running anymore, `False` if the wait timed out or `pause` was called from
+            the step thread itself.
+        """
         self.running = False
-        if self._step_thread:
-            self._step_thread.join()
+        if self._thread_ident == get_ident():  # Called from the step thread itself, which can't wait on itself
+            return False
+        return self._stopped_event.wait(timeout)
 
     def stop(self):
         """ Called when the controller is stopped. """
@@ -205,12 +329,14 @@ class Controller:
     def shutdown(self):
         """ Called when the controller is shut down. """
         self.pause()
+        self._stop_worker()
         self.brain['on_shutdown']()
         self.robot.on_shutdown()
 
     def failure(self):
         """ Called when the controller fails. """
         self.pause()
+        self._stop_worker()
         self.started = False
         self.stopped = True
         try:
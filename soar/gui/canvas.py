@@ -14,6 +14,23 @@ from soar import __version__
 
 SYSTEM = platform.system()
 
+# The mouse event sequences bound to each handler an object in a world may define. Right-click bindings on Mac are
+# different, and Ctrl-click is also bound in case there isn't a right click for some reason
+if SYSTEM == 'Darwin':
+    MOUSE_BINDINGS = [('on_press_left', ('<ButtonPress-1>',)),
+                      ('on_motion_left', ('<B1-Motion>',)),
+                      ('on_release_left', ('<ButtonRelease-1>',)),
+                      ('on_press_right', ('<ButtonPress-2>', '<Control-ButtonPress-1>')),
+                      ('on_motion_right', ('<B2-Motion>',)),
+                      ('on_release_right', ('<ButtonRelease-2>', '<Control-ButtonRelease-1>'))]
+else:
+    MOUSE_BINDINGS = [('on_press_left', ('<ButtonPress-1>',)),
+                      ('on_motion_left', ('<B1-Motion>',)),
+                      ('on_release_left', ('<ButtonRelease-1>',)),
+                      ('on_press_right', ('<ButtonPress-3>', '<Control-ButtonPress-1>')),
+                      ('on_motion_right', ('<B3-Motion>', '<Control-B1-Motion>')),
+                      ('on_release_right', ('<ButtonRelease-3>', '<Control-ButtonRelease-1>'))]
+
 
 def canvas_from_world(world, toplevel=Toplevel, close_cmd=None):
     """ Return a :class:`soar.gui.canvas.SoarCanvas` in a new window from a World. Optionally, call a different
@@ -46,34 +63,11 @@ def canvas_from_world(world, toplevel=Toplevel, close_cmd=None):
     c.pack(fill=BOTH, expand=YES)
     world.canvas = c
     for obj in world:  # Bind mouse events to any object in the world which defines them
-        for attr in ['on_press_left', 'on_motion_left', 'on_release_left', 'on_press_right', 'on_motion_right',
-                     'on_release_right']:
-            if hasattr(obj, attr):
-                if attr == 'on_press_left':
-                    c.tag_bind(obj.tags, '<ButtonPress-1>', obj.on_press_left)
-                elif attr == 'on_motion_left':
-                    c.tag_bind(obj.tags, '<B1-Motion>', obj.on_motion_left)
-                elif attr == 'on_release_left':
-                    c.tag_bind(obj.tags, '<ButtonRelease-1>', obj.on_release_left)
-                elif attr == 'on_press_right':
-                    if SYSTEM == 'Darwin':  # Right-click bindings on Mac are different
-                        c.tag_bind(obj.tags, '<ButtonPress-2>', obj.on_press_right)
-                    else:
-                        c.tag_bind(obj.tags, '<ButtonPress-3>', obj.on_press_right)
-                    # Also bind to Ctrl-click for Mac, in case there isn't a right click for some reason?
-                    c.tag_bind(obj.tags, '<Control-ButtonPress-1>', obj.on_press_right)
-                elif attr == 'on_motion_right':
-                    if SYSTEM == 'Darwin':
-                        c.tag_bind(obj.tags, '<B2-Motion>', obj.on_motion_right)
-                    else:
-                        c.tag_bind(obj.tags, '<B3-Motion>', obj.on_motion_right)
-                        c.tag_bind(obj.tags, '<Control-B1-Motion>', obj.on_motion_right)
-                elif attr == 'on_release_right':
-                    if SYSTEM == 'Darwin':
-                        c.tag_bind(obj.tags, '<ButtonRelease-2>', obj.on_release_right)
-                    else:
-                        c.tag_bind(obj.tags, '<ButtonRelease-3>', obj.on_release_right)
-                    c.tag_bind(obj.tags, '<Control-ButtonRelease-1>', obj.on_release_right)
+        for attr, sequences in MOUSE_BINDINGS:
+            handler = getattr(obj, attr, None)
+            if handler is not None:
+                for sequence in sequences:
+                    c.tag_bind(obj.tags, sequence, handler)
     return c
 
 
@@ -91,6 +85,12 @@ class SoarCanvas(Canvas):
         self.bind("<Configure>", self.on_resize)
         self.width = options['width']
         self.height = options['height']
+        self.delete_count = 0  # Incremented by every delete, so that cached item ids can be checked cheaply
+
+    def delete(self, *args):
+        """ Delete items from the canvas, as with any Tk canvas, counting the deletion in `delete_count`. """
+        self.delete_count += 1
+        Canvas.delete(self, *args)
 
     def on_resize(self, event):
         wscale = event.width / float(self.width)
@@ -135,14 +135,25 @@ class SoarCanvas(Canvas):
         Canvas.create_text(self, *args, **kw)
 
     def remap_coords(self, coords):
-        remapped = []
-        for i in range(len(coords)):
-            c = coords[i]*self.pixels_per_meter
-            if i % 2 == 1:  # Every other coordinate is a y coordinate, and so must be remapped
-                c = self.height-c
-            remapped.append(c)
+        ppm, height = self.pixels_per_meter, self.height
+        if len(coords) == 4:  # Lines, like walls and sonars, are the most common, so handle them directly
+            return [coords[0]*ppm, height-coords[1]*ppm, coords[2]*ppm, height-coords[3]*ppm]
+        remapped = [c*ppm for c in coords]
+        remapped[1::2] = [height-c for c in remapped[1::2]]  # Every other coordinate is a y coordinate, and is flipped
         return remapped
 
+    def remap_points(self, points):
+        """ Remap a sequence of points in meters to a flat list of pixel coordinates, in a single pass.
+
+        Args:
+            points: A sequence of :class:`soar.sim.geometry.Point`, or other objects with `x` and `y` attributes.
+
+        Returns:
+            list: The flattened `[x0, y0, x1, y1, ...]` pixel coordinates, as `remap_coords` would return them.
+        """
+        ppm, height = self.pixels_per_meter, self.height
+        return [c for p in points for c in (p.x*ppm, height-p.y*ppm)]
+
 
 class SoarCanvasFrame(Frame):
     """ A resizable frame that holds a `SoarCanvas`. """
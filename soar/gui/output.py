@@ -8,26 +8,99 @@ Tk widgets allowing the capture and display of text output in the GUI.
 """
 import webbrowser
 from io import StringIO
+from itertools import count
+from threading import Lock
 
 from tkinter import *
 
 
 class SoarIO(StringIO):
-    def __init__(self, write_func):
+    """ A file-like object that passes whatever is written to it to a function, a line at a time.
+
+    Writes are buffered until a newline is written or the object is flushed, so that a line written in several pieces
+    (as :func:`print` does with its arguments, separators and line ending) reaches the function, and the GUI, in one
+    call. If a Tk widget is given, a partial line, like a prompt, is also passed on after a short delay. Text is always
+    passed on in the order it was written, even when several threads write at once.
+
+    Args:
+        write_func: The function to call with the buffered text.
+        master (optional): A Tk widget whose event loop periodically passes on partial lines.
+    """
+    partial_line_delay = 50  #: The number of milliseconds after which text without a newline is passed on anyway
+
+    def __init__(self, write_func, master=None):
         StringIO.__init__(self)
         self.write_func = write_func
+        self.master = master
+        self._pending = []  # Text written since the last flush
+        self._ready = []  # Flushed text, in order, waiting to be passed to write_func
+        self._lock = Lock()  # Output may be written from several threads at once
+        self._dispatching = False  # Whether some thread is currently passing text to write_func
+        self._after_id = None  # The scheduled check for partial lines, if any
+        if master is not None:
+            self._after_id = master.after(self.partial_line_delay, self._flush_partial)
 
     def write(self, s):
-        self.write_func(s)
-
-
-_link_id = 0
+        line_ended = '\n' in s
+        with self._lock:
+            self._pending.append(s)
+        if line_ended:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        # Text is handed off under the lock, so its order is fixed there. Only one thread at a time passes text on,
+        # without holding the lock, since write_func may wait on the Tk thread, which may itself be waiting to write
+        with self._lock:
+            if self._pending:
+                self._ready.append(''.join(self._pending))
+                self._pending = []
+            if self._dispatching:  # The thread already passing text on will pass this on too, in order
+                return
+            self._dispatching = True
+        try:
+            while True:
+                with self._lock:
+                    if not self._ready:
+                        self._dispatching = False
+                        return
+                    text, self._ready = ''.join(self._ready), []
+                self.write_func(text)
+        except BaseException:
+            with self._lock:
+                self._dispatching = False
+            raise
+
+    def _flush_partial(self):  # Runs in the Tk event loop, and reschedules itself until the object is closed
+        if self._pending:  # Checked without the lock, since a write missed now is caught by the next check
+            self.flush()
+        self._after_id = self.master.after(self.partial_line_delay, self._flush_partial)
+
+    def close(self):
+        if self._after_id is not None:
+            try:
+                self.master.after_cancel(self._after_id)
+            except TclError:
+                pass
+            self._after_id = None
+        try:  # Pass on anything left over, unless the GUI is already gone
+            self.flush()
+        except TclError:
+            pass
+        StringIO.close(self)
+
+
+# Keys that may reach the text field, which is otherwise kept read-only through its bindings
+_NAVIGATION_KEYS = {'Left', 'Right', 'Up', 'Down', 'Home', 'End', 'Prior', 'Next'}
+_COPY_KEYS = {'c', 'C', 'a', 'A', 'slash'}  # Copy and select all
+_COPY_MODIFIERS = 0x4 | 0x8  # Control, and Command on macOS
+_EDIT_EVENTS = ('<<Cut>>', '<<Paste>>', '<<PasteSelection>>', '<<Clear>>', '<<Undo>>', '<<Redo>>')
+
+_link_ids = count()
 
 
 def _new_link_id():
-    global _link_id
-    return 'link' + str(_link_id)
-    _link_id += 1
+    return 'link' + str(next(_link_ids))
 
 
 class OutputFrame(Frame):
@@ -42,12 +115,18 @@ class OutputFrame(Frame):
         self.scroll = Scrollbar(self)
         self.scroll.pack(side=RIGHT, fill=Y)
         self.text_field = Text(self, fg='black', bg='white', wrap=WORD, yscrollcommand=self.scroll.set)
-        self.text_field.config(height=16, padx=5, pady=5, state=DISABLED)
+        # The field stays in the NORMAL state, so that inserting text does not need two extra state changes; user
+        # edits are blocked by the bindings instead, and the insertion cursor is hidden
+        self.text_field.config(height=16, padx=5, pady=5, insertontime=0)
+        self.text_field.bind('<Key>', self._on_key)
+        for sequence in _EDIT_EVENTS:
+            self.text_field.bind(sequence, lambda event: 'break')
         self.text_field.tag_config('output', foreground='black')
         self.text_field.tag_config('error', foreground='red')
         self.text_field.bind("<1>", lambda event: self.text_field.focus_set())
         self.text_field.pack(expand=True, fill='both')
         self.scroll.config(command=self.text_field.yview)
+        self._see_scheduled = False
         if initial_text != '':
             self.output(initial_text)
 
@@ -59,10 +138,22 @@ class OutputFrame(Frame):
             *tags: Variable length `str` list of tags to attach to the text. The `'output'` tag signifies normal output,
                    and the `'error'` tag signifies that the text will be red.
         """
-        self.text_field.config(state=NORMAL)
         self.text_field.insert(END, text, *tags)
-        self.text_field.see("%s-2c" % END)  # Ensure the inserted text is visible
-        self.text_field.config(state=DISABLED)
+        if not self._see_scheduled:  # Scroll once after a burst of inserts, rather than once per insert
+            self._see_scheduled = True
+            self.text_field.after_idle(self._see_end)
+
+    @staticmethod
+    def _on_key(event):
+        """ Allow only navigation and copying in the text field. """
+        if event.keysym in _NAVIGATION_KEYS or (event.state & _COPY_MODIFIERS and event.keysym in _COPY_KEYS):
+            return None
+        return 'break'
+
+    def _see_end(self):
+        """ Ensure the most recently inserted text is visible. """
+        self._see_scheduled = False
+        self.text_field.see("%s-2c" % END)
 
     def output(self, text):
         """ Insert normal output text at the end of the text field.
@@ -95,6 +186,4 @@ class OutputFrame(Frame):
 
     def clear(self):
         """ Clear the entire text field. """
-        self.text_field.config(state=NORMAL)
         self.text_field.delete(1.0, END)
-        self.text_field.config(state=DISABLED)
@@ -17,6 +17,8 @@ Note:
 
 Based on code written by Adam Hartz, August 1st 2012.
 """
+from contextlib import contextmanager
+
 import matplotlib
 import platform
 if platform.system() == 'Darwin':  # Fix for Soar crashing on macOS
@@ -43,6 +45,7 @@ class PlotWindow(plt.Figure):
     _tk_started = False  # If this is True, uses Toplevel to create the window, otherwise creates a main window
 
     def __init__(self, title="Plotting Window", visible=True):
+        self._suspend_show = False
         plt.Figure.__init__(self)
         self.add_subplot(111)
         self.visible = visible
@@ -83,15 +86,33 @@ class PlotWindow(plt.Figure):
         """ Clear the plot, keeping the Tk window active. """
         self.clf()
         self.add_subplot(111)
-        if self.visible:
-            self.show()
+        self._auto_show()
 
     def show(self):
-        """ Update the canvas image (automatically called for most functions). """
+        """ Update the canvas image (automatically called for most functions).
+
+        Calling this redraws the canvas immediately. The automatic updates instead redraw it once Tk is next idle, so
+        several updates in a row result in a single redraw.
+        """
+        self.canvas.draw()
+
+    @contextmanager
+    def batch(self):
+        """ Context manager that delays the automatic canvas updates of the plotting functions until the end of the
+        `with` block, so that many plotting calls update the canvas only once.
+        """
+        suspended = self._suspend_show
+        self._suspend_show = True
         try:
-            self.canvas.draw()
-        except Exception:
-            self.canvas.show()
+            yield self
+        finally:
+            self._suspend_show = suspended
+            if not suspended:
+                self._auto_show()
+
+    def _auto_show(self):
+        if self.visible and not self._suspend_show:
+            self.canvas.draw_idle()
 
     def __getattr__(self, name):
         show = True
@@ -103,10 +124,11 @@ class PlotWindow(plt.Figure):
             if hasattr(attr,'__call__'):
                 if show:
                     def tmp(*args,**kwargs):
-                        out = attr(*args,**kwargs)
-                        if self.visible:
-                            self.show()
+                        # Look up the method on every call, as clear() replaces the axes
+                        out = getattr(self.axes[0], name)(*args,**kwargs)
+                        self._auto_show()
                         return out
+                    self.__dict__[name] = tmp  # Cache the wrapper, so later lookups do not reach __getattr__
                     return tmp
                 else:
                     return attr
@@ -123,8 +145,7 @@ class PlotWindow(plt.Figure):
         """ Create a legend for the figure (requires plots to have been made with labels) """
         handles, labels = self.axes[0].get_legend_handles_labels()
         self.axes[0].legend(handles, labels)
-        if self.visible:
-            self.show()
+        self._auto_show()
 
     def save(self, fname, **kwargs):
         """ Save this plot as an image.  File type determined by extension of filename passed in.
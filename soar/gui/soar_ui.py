@@ -9,11 +9,11 @@ Classes for building the main GUI, which allows the user to load brains & worlds
 import os
 import sys
 import traceback as tb
-from queue import Queue
+from queue import Queue, Full, Empty
 from threading import Thread
 from threading import Event as ThreadEvent
+from time import monotonic
 from tkinter import Frame, Button, Label, Entry, PhotoImage, Tk, RIGHT, DISABLED, NORMAL, Toplevel, END, TOP
-from tkinter import filedialog
 
 from soar import __version__, blerb
 from soar.common import *
@@ -22,6 +22,36 @@ from soar.gui.output import OutputFrame, SoarIO
 from soar.update import get_update_message
 
 
+class StateButton(Button):
+    """ A Tk Button that remembers its state, so that reading it does not require a call into Tk.
+
+    Args:
+        master: The parent widget or window in which to place the button.
+        **kwargs: Arbitrary Tk keyword arguments.
+    """
+    def __init__(self, master, **kwargs):
+        Button.__init__(self, master, **kwargs)
+        self.state = kwargs.get('state', NORMAL)
+
+    def configure(self, cnf=None, **kwargs):
+        """ Configure the button, as with any Tk widget, remembering its state if it is set. """
+        result = Button.configure(self, cnf, **kwargs)
+        for options in (cnf, kwargs):
+            if isinstance(options, dict) and 'state' in options:
+                self.state = options['state']
+        return result
+
+    config = configure
+
+    def __setitem__(self, key, value):
+        self.configure({key: value})
+
+    def __getitem__(self, item):
+        if item == 'state':
+            return self.state
+        return Button.__getitem__(self, item)
+
+
 class ButtonFrame(Frame):
     """ A Tk frame containing an image Button and a Label immediately beneath it, arranged via the grid geometry manager.
 
@@ -38,8 +68,9 @@ class ButtonFrame(Frame):
     """
     def __init__(self, master, image=None, text=None, command=None, state=None):
         Frame.__init__(self, master)
-        self.button = Button(self)
+        self.button = StateButton(self)
         self.label = Label(self)
+        self._image = self._text = self._command = None  # The options last applied, so that unchanged ones are skipped
         self.config(image, text, command, state)
         self.button.grid(row=0, column=0)
         self.label.grid(row=1, column=0)
@@ -54,18 +85,24 @@ class ButtonFrame(Frame):
             command (optional): The function to call when the button is clicked.
             state (optional): The state of the button, either NORMAL or DISABLED.
         """
-        if image:
-            self.button.config(image=image)
-        if text:
+        # Only options that actually change are passed to Tk, with the button's options combined into a single call.
+        # This also avoids registering a new Tcl command each time the same command is set
+        options = {}
+        if image and image is not self._image:
+            options['image'] = self._image = image
+        if command and command != self._command:
+            options['command'] = self._command = command
+        if state and state != self.button.state:
+            options['state'] = state
+        if options:
+            self.button.config(**options)
+        if text and text != self._text:
             self.label.config(text=text)
-        if command:
-            self.button.config(command=command)
-        if state:
-            self.button.config(state=state)
+            self._text = text
 
-    def __getitem__(self, item):  # For getting the state of the widget
+    def __getitem__(self, item):  # For getting the state of the widget, without a call into Tk
         if item == 'state':
-            return self.button['state']
+            return self.button.state
         else:
             raise KeyError
 
@@ -85,13 +122,10 @@ class IntegerEntry(Entry):
         self.insert(0, value)
 
     def _validate(self, S):
-        try:
-            int(S)
-        except ValueError:
-            self.bell()
-            return False
-        else:
+        if S.isdecimal():  # Checked directly, rather than by trying to convert every keystroke
             return True
+        self.bell()
+        return False
 
 
 class LoadingIcon(Label):
@@ -102,32 +136,46 @@ class LoadingIcon(Label):
         file (str): The path to an animated ``.gif``. The last frame should be empty/transparent.
         frames (int): The number of frames in the ``.gif``.
     """
+    frame_interval = 0.05  #: The time between frames, in seconds
+
     def __init__(self, parent, file, frames):
         Label.__init__(self, parent)
         self.parent = parent
         self._frames = [PhotoImage(file=file, format='gif -index %i' % i) for i in range(frames)]
         self.config(image=self._frames[-1])
         self._current_frame = 0
+        self._next_frame = 0.0
         self.visible = False
-        self._tk_loop = self.parent.after(0, lambda: None)
+        self._tk_loop = None  # The id of the pending frame callback, if any
 
     def _frame_loop(self):
         if self.visible:
             self.config(image=self._frames[self._current_frame])
             self._current_frame += 1
             self._current_frame %= len(self._frames)-1
-            self._tk_loop = self.parent.after(50, self._frame_loop)
+            # Schedule against a fixed deadline, so that time spent in other callbacks does not slow the animation
+            now = monotonic()
+            self._next_frame = max(self._next_frame + self.frame_interval, now)  # If behind, don't try to catch up
+            self._tk_loop = self.parent.after(int((self._next_frame - now)*1000), self._frame_loop)
+
+    def _cancel_loop(self):  # Cancel the pending frame callback, so that only one is ever scheduled
+        if self._tk_loop is not None:
+            self.parent.after_cancel(self._tk_loop)
+            self._tk_loop = None
 
     def show(self):
         if not self.visible:
+            self._cancel_loop()
             self.visible = True
             self._current_frame = 0
+            self._next_frame = monotonic()
             self._frame_loop()
 
     def hide(self):
-        self.visible = False
-        self.config(image=self._frames[-1])
-        self.parent.after_cancel(self._tk_loop)
+        self._cancel_loop()
+        if self.visible:
+            self.visible = False
+            self.config(image=self._frames[-1])
 
 
 class SoarUI(Tk):
@@ -170,7 +218,7 @@ class SoarUI(Tk):
         self.world_but = ButtonFrame(self)
         self.sim = ButtonFrame(self)
         self.connect = ButtonFrame(self)
-        self.close_but = Button(self)
+        self.close_but = StateButton(self)
         self.output = OutputFrame(self)
         for i, l in enumerate(blerb.split('\n')):
             if i != 1:
@@ -186,6 +234,8 @@ class SoarUI(Tk):
         self.initialize()
         self.windows = []
         self.sim_canvas = None
+        self.draw_queue = Queue(maxsize=2)  # Pending frames; stale ones are dropped if the UI falls behind
+        self._drain_scheduled = False  # Whether a drain of the draw queue is already pending in the event loop
         self.connected = False
         self.button_list = [self.play, self.step, self.stop, self.reload, self.brain_but, self.world_but, self.sim,
                             self.connect, self.close_but]
@@ -257,8 +307,8 @@ class SoarUI(Tk):
         """
         _stdout = sys.stdout
         _stderr = sys.stderr
-        sys.stdout = SoarIO(self.output.output)
-        sys.stderr = SoarIO(self.output.error)
+        sys.stdout = SoarIO(self.output.output, self)
+        sys.stderr = SoarIO(self.output.error, self)
         t = Thread(target=self.client_mainloop, daemon=True)
         t.start()
         Tk.mainloop(self, n)
@@ -277,9 +327,19 @@ class SoarUI(Tk):
             The new Toplevel window.
         """
         t = Toplevel()
-        self.windows.append((t, linked))
+        entry = (t, linked)
+        self.windows.append(entry)
+        # Forget the window as soon as it is destroyed, however that happens. Children of the window also receive its
+        # <Destroy> binding, so only the window's own event is acted upon
+        t.bind('<Destroy>', lambda event: self._forget_window(entry) if event.widget is t else None, add='+')
         return t
 
+    def _forget_window(self, entry):  # Remove a (window, linked) entry from the window list, if it is still there
+        try:
+            self.windows.remove(entry)
+        except ValueError:
+            pass
+
     def attach_window(self, w, linked=True):
         """ Attach an existing window to the SoarUI.
 
@@ -298,14 +358,24 @@ class SoarUI(Tk):
         Args:
             close_unlinked (bool): If `True`, closes all windows. Otherwise, closes only the linked ones.
         """
-        for tup in reversed(self.windows):
-            window, linked = tup
+        windows, self.windows = self.windows, []  # Destroying a window may remove it from the list, so detach it
+        kept = []
+        for entry in reversed(windows):  # Newest windows are closed first
+            window, linked = entry
             if linked or close_unlinked:
-                self.windows.remove(tup)
                 try:
                     window.destroy()
                 except Exception:  # Probably already destroyed?
                     pass
+            else:
+                kept.append(entry)
+        kept.reverse()
+        self.windows = kept + self.windows  # Keep any window opened while the others were being destroyed
+        while True:  # Drop any frames still waiting to be drawn
+            try:
+                self.draw_queue.get_nowait()
+            except Empty:
+                break
         self.sim_canvas = None
 
     def future(self, func, *args, after_idle=False, **kwargs):
@@ -335,6 +405,41 @@ class SoarUI(Tk):
         else:
             return q.get()
 
+    def queue_draw(self, obj):
+        """ Queue an object to be drawn on the simulator canvas, from any thread.
+
+        Objects are drawn with whatever state they have when the queue is drained, so if the queue is full the oldest
+        pending frame is stale and is dropped, rather than letting frames pile up behind a slow UI.
+
+        Args:
+            obj: The object to draw, typically a :class:`soar.sim.world.World`.
+        """
+        try:
+            self.draw_queue.put_nowait(obj)
+        except Full:
+            try:
+                self.draw_queue.get_nowait()
+            except Empty:  # The queue was drained in the meantime
+                pass
+            self.draw_queue.put_nowait(obj)
+        if not self._drain_scheduled:  # A pending drain will pick this object up, so only schedule one if needed
+            self._drain_scheduled = True
+            self.after_idle(self.draw_queued)
+
+    def draw_queued(self):  # Draws every object currently on the draw queue, once each
+        self._drain_scheduled = False  # Cleared first, so objects queued during the drain schedule another one
+        pending = []
+        while True:
+            try:
+                obj = self.draw_queue.get_nowait()
+            except Empty:
+                break
+            # Objects are drawn with their current state, so an object queued more than once need only be drawn once
+            if all(obj is not other for other in pending):
+                pending.append(obj)
+        for obj in pending:
+            self.draw(obj)
+
     def draw(self, obj):  # Draws an object on the simulator canvas
         if self.sim_canvas is not None:
             try:
@@ -431,6 +536,10 @@ class SoarUI(Tk):
         """
         sim_canvas, connected = self.sim_canvas, self.connected
         self.reset(clear_output=clear_output)
+        if not (self.brain_path or self.world_path or sim_canvas or connected or self.windows):
+            if callback:  # Nothing has been loaded or opened, so there is nothing to shut down or reload
+                callback()
+            return
         self.loading()
         self.client_future(SHUTDOWN_CONTROLLER)
         if close_unlinked:
@@ -468,6 +577,7 @@ class SoarUI(Tk):
 
     def brain_cmd(self):
         """ Called when the brain button is pushed. """
+        from tkinter import filedialog  # Only needed once a file is chosen, so not imported by headless runs
         new_brain = filedialog.askopenfilename(initialdir=self.brain_dir, **self.file_opt)
         if new_brain:
             # If a brain and world were already loaded, reload
@@ -489,6 +599,7 @@ class SoarUI(Tk):
 
     def world_cmd(self):
         """ Called when the world button is pushed. """
+        from tkinter import filedialog
         new_world = filedialog.askopenfilename(initialdir=self.world_dir, **self.file_opt)
         if new_world:
             if self.brain_path is not None and self.world_path is not None:
@@ -527,15 +638,10 @@ class SoarUI(Tk):
         """ Called when the simulator is ready. """
         self.done_loading()
         self.connected = False
-        self.play.config(image=self.play_image, state=NORMAL)
-        self.step.config(state=NORMAL)
-        self.stop.config(state=DISABLED)
-        self.reload.config(state=NORMAL)
-        self.brain_but.config(state=NORMAL)
-        self.world_but.config(state=NORMAL)
-        self.sim.config(state=NORMAL)
-        self.connect.config(state=NORMAL)
-        self.close_but.config(state=NORMAL)
+        self.play.config(image=self.play_image)
+        self._apply_states([(self.play, NORMAL), (self.step, NORMAL), (self.stop, DISABLED), (self.reload, NORMAL),
+                            (self.brain_but, NORMAL), (self.world_but, NORMAL), (self.sim, NORMAL),
+                            (self.connect, NORMAL), (self.close_but, NORMAL)])
 
     def connect_cmd(self):
         """ Called when the connect to robot button is pushed. """
@@ -555,15 +661,11 @@ class SoarUI(Tk):
         self.done_loading()
         self.connected = True
         self.sim_canvas = None
-        self.play.config(image=self.play_image, state=NORMAL)
-        self.step.config(state=DISABLED)
-        self.stop.config(state=DISABLED)
-        self.reload.config(state=NORMAL)
-        self.brain_but.config(state=NORMAL)
-        self.world_but.config(state=NORMAL)
-        self.sim.config(state=NORMAL if self.world_path else DISABLED)
-        self.connect.config(state=DISABLED)
-        self.close_but.config(state=NORMAL)
+        self.play.config(image=self.play_image)
+        self._apply_states([(self.play, NORMAL), (self.step, DISABLED), (self.stop, DISABLED), (self.reload, NORMAL),
+                            (self.brain_but, NORMAL), (self.world_but, NORMAL),
+                            (self.sim, NORMAL if self.world_path else DISABLED), (self.connect, DISABLED),
+                            (self.close_but, NORMAL)])
 
     def gui_error(self):
         """ Called when a GUI error occurs, such as an error while drawing a world or window. """
@@ -587,35 +689,31 @@ class SoarUI(Tk):
 
     def loading(self):
         """ Disable user interaction and animate the loading icon. """
-        button_states = []
-        for button in self.button_list:
-            if button['state'] == 'disabled':
-                button_states.append(DISABLED)
-            else:
-                button_states.append(NORMAL)
+        # Button states are remembered by the buttons themselves, so this snapshot makes no calls into Tk
+        button_states = [DISABLED if button['state'] == DISABLED else NORMAL for button in self.button_list]
         self.button_state_frames.append(button_states)
-        self.play.config(state=DISABLED)
-        self.step.config(state=DISABLED)
-        self.stop.config(state=DISABLED)
-        self.reload.config(state=DISABLED)
-        self.brain_but.config(state=DISABLED)
-        self.world_but.config(state=DISABLED)
-        self.sim.config(state=DISABLED)
-        self.connect.config(state=DISABLED)
-        self.close_but.config(state=DISABLED)
+        self._apply_states((button, DISABLED) for button in self.button_list)
         if not self.loading_icon.visible:
             self.loading_icon.show()
 
     def done_loading(self):
         """ Re-enable user interaction, and hide the loading icon. """
         if len(self.button_state_frames) > 0:
-            button_states = self.button_state_frames.pop()
-            for i, button in enumerate(self.button_list):
-                button.config(state=button_states[i])
+            self._apply_states(zip(self.button_list, self.button_state_frames.pop()))
         if len(self.button_state_frames) == 0 and self.loading_icon.visible:
             self.loading_icon.hide()
 
+    def _apply_states(self, states):
+        """ Set the states of several buttons, only reconfiguring those whose state actually changes.
+
+        Args:
+            states: An iterable of `(button, state)` pairs.
+        """
+        for button, state in states:
+            if button['state'] != state:
+                button.config(state=state)
+
     def cancel_all_loading(self):
         """ Hide the loading icon and delete all button state frames. """
-        self.button_state_frames = []
+        self.button_state_frames.clear()
         self.loading_icon.hide()
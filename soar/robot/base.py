@@ -51,6 +51,7 @@ class BaseRobot(WorldObject):
         self.polygon = Polygon(polygon.points, polygon.center, tags=self.tags, **polygon.options)
         # The maximum radius, used for pushing the robot back before a collision
         self._radius = sorted([self.polygon.center.distance(vertex) for vertex in self.polygon])[-1]
+        self._canvas_poly = None  # A (canvas, delete count, item) tuple for the drawn polygon, once found on a canvas
 
     def set_robot_options(self, **options):
         """ Set one or many keyworded, robot-specific options. Document these options here.
@@ -82,8 +83,7 @@ class BaseRobot(WorldObject):
         x, y, t = pose
         current_theta = self.pose[2]
         self.pose = Pose(x, y, t)
-        self.polygon.recenter(self.pose)
-        self.polygon.rotate(self.polygon.center, t - current_theta)
+        self.polygon.recenter(self.pose, t - current_theta)
 
     def collision(self, other, eps=1e-8):
         """ Determine whether the robot collides with an object.
@@ -113,14 +113,18 @@ class BaseRobot(WorldObject):
         Args:
             canvas: An instance of :class:`soar.gui.canvas.SoarCanvas`.
         """
-        try:  # Try and find the drawn polygon on the canvas, in case it already exists
-            canvas_poly = canvas.find_withtag(self.tags)[0]
-        except IndexError:  # If no such item exists, draw it for the first time
-            self.polygon.draw(canvas)
-        else:
-            # Remap metered coordinates to pixel coordinates, and change the canvas polygon
-            coords = canvas.remap_coords([p for pair in self.polygon for p in pair])
-            canvas.coords(canvas_poly, coords)
+        # The cached item is only trusted on the same canvas, and if nothing has been deleted from it since
+        delete_count = getattr(canvas, 'delete_count', None)
+        if self._canvas_poly is None or self._canvas_poly[0] is not canvas or self._canvas_poly[1] != delete_count:
+            try:  # Try and find the drawn polygon on the canvas, in case it already exists
+                self._canvas_poly = (canvas, delete_count, canvas.find_withtag(self.tags)[0])
+            except IndexError:  # If no such item exists, draw it for the first time
+                self._canvas_poly = None
+                self.polygon.draw(canvas)
+                return
+        # Remap metered coordinates to pixel coordinates, and change the canvas polygon
+        coords = canvas.remap_points(self.polygon.points)
+        canvas.coords(self._canvas_poly[2], coords)
 
     def delete(self, canvas):  # TODO: Deprecate this in 2.0
         """ Delete the robot from a canvas.
@@ -129,6 +133,7 @@ class BaseRobot(WorldObject):
             canvas: An instance of :class:`soar.gui.canvas.SoarCanvas`.
         """
         self.polygon.delete(canvas)
+        self._canvas_poly = None
 
     def on_load(self):
         """ Called when the controller of the robot is loaded.
@@ -188,8 +193,7 @@ class BaseRobot(WorldObject):
                 new_pos = Pose(safe_point.x, safe_point.y, new_pos[2])
 
             self.pose = new_pos
-            self.polygon.recenter(new_pos)
-            self.polygon.rotate(self.polygon.center, d_t)
+            self.polygon.recenter(new_pos, d_t)
 
     def on_stop(self):
         """ Called when the controller of the robot is stopped. """
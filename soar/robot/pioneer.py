@@ -11,7 +11,7 @@ See the `MobileRobots documentation`_ for more information.
 import re
 from time import sleep
 from threading import Thread
-from math import pi, sqrt, atan2
+from math import pi, sqrt, atan2, sin, cos
 from uuid import getnode
 
 from soar.errors import SoarIOError
@@ -61,6 +61,11 @@ class PioneerRobot(BaseRobot):
                    Pose(0.174, 0.0266, pi/18), Pose(0.174, -0.0266, -pi/18), Pose(0.156, -0.077, -pi/6),
                    Pose(0.122, -0.118, -5*pi/18), Pose(0.08, -0.134, -pi/2)]
     SONAR_MAX = 1.5  # meters
+    # The outline of the robot's body, relative to its center, shared by every instance
+    polygon_points = ((-0.034, -0.219), (0.057, -0.219), (0.139, -0.170), (0.196, -0.098), (0.216, -0.009),
+                      (0.196, 0.079), (0.139, 0.150), (0.057, 0.190), (-0.034, 0.190), (-0.051, 0.190), (-0.051, 0.150),
+                      (-0.153, 0.150), (-0.223, 0.074), (-0.223, -0.103), (-0.153, -0.179), (-0.051, -0.179),
+                      (-0.051, -0.219))
     """ An abstract, universal Pioneer 3 robot. Instances of this class can be fully simulated, or used to communicate
     with an actual Pioneer3 robot over a serial port.
 
@@ -84,17 +89,14 @@ class PioneerRobot(BaseRobot):
     def __init__(self, **options):
         self.FV_CAP = 1.5  # meters/second
         self.RV_CAP = 2 * pi  # radians/second
-        BaseRobot.__init__(self, polygon=Polygon([(-0.034, -0.219), (0.057, -0.219), (0.139, -0.170), (0.196, -0.098),
-                                                  (0.216, -0.009), (0.196, 0.079), (0.139, 0.150), (0.057, 0.190),
-                                                  (-0.034, 0.190), (-0.051, 0.190), (-0.051, 0.150), (-0.153, 0.150),
-                                                  (-0.223, 0.074), (-0.223, -0.103), (-0.153, -0.179), (-0.051, -0.179),
-                                                  (-0.051, -0.219)], None, fill='black', dummy=True))
+        BaseRobot.__init__(self, polygon=Polygon(self.polygon_points, None, fill='black', dummy=True))
         self.arcos = None  # The ARCOS client, if connected
         self.serial_device = None  # The serial device, if connected
         self._fv = 0.0  # Internal forward velocity storage
         self._rv = 0.0  # Internal rotational velocity storage
         self._collided = False  # Private flag to check if the robot has collided
         self._sonars = None  # Super secret calculated sonars (shh)
+        self._sonar_lines = None  # A (canvas, delete count, items, fills) tuple for the drawn sonar lines, once found
         self._move_data = {'x': 0, 'y': 0, 'item': None}  # Drag data for the canvas
         self._turn_data = {'x': 0, 'y': 0, 'item': None}  # Drag data for the canvas
         self._serial_ports = None  # Serial ports to use when connecting with ARCOS; any if None
@@ -110,7 +112,8 @@ class PioneerRobot(BaseRobot):
         This contains the robot type, position, sonar data, and forward and rotational velocities.
         """
         d = BaseRobot.to_dict(self)
-        d.update({'sonars': self.sonars, 'collided': self._collided})
+        d['sonars'] = self.sonars
+        d['collided'] = self._collided
         return d
 
     def set_robot_options(self, **options):
@@ -267,40 +270,64 @@ class PioneerRobot(BaseRobot):
         else:
             return self.SONAR_MAX, None
 
+    def sonar_origins(self):  # The pose of each sonar in the world, based on the robot's current pose
+        x, y, t = self.pose
+        c, s = cos(t), sin(t)  # The rotation is the same for every sonar, so only compute it once
+        origins = []
+        for sonar in self.sonar_poses:
+            # Translate and turn by the robot's pose, then rotate about its center
+            o_x, o_y = sonar.x+x, sonar.y+y
+            origins.append(Pose((o_x-x)*c-(o_y-y)*s+x, (o_x-x)*s+(o_y-y)*c+y, (sonar.t+t) % (2.0*pi)))
+        return origins
+
     def calc_sonars(self):  # Calculate the actual sonar ranges. Called once per simulated timestep
         self._sonars = [0]*len(self.sonar_poses)
-        for i in range(len(self.sonar_poses)):
+        for i, origin in enumerate(self.sonar_origins()):
             # We take each sonar and build a ray longer than the world's max diagonal
-            origin = self.sonar_poses[i]
-            # Translate and turn by the robot's pose, then rotate about its center
-            origin = origin.transform(self.pose).rotate(self.pose.point(), self.pose[2])
             sonar_ray = Ray(origin, 1.5*max(self.world.dimensions), dummy=True)
 
             # Find all collisions with objects that aren't the robot itself
             # Sonars only accurate to the millimeter, so let epsilon be 0.001 meters
             collisions = self.world.find_all_collisions(sonar_ray, condition=lambda obj: obj is not self, eps=1e-3)
             if collisions:  # Should always be True since the world has boundaries
-                # Sort the collisions by distance to origin
-                distances = [origin.distance(p) for _, p in collisions]
-                distances.sort()
-                self._sonars[i] = distances[0]  # Sonar reading is the distance to the nearest collision
+                # Sonar reading is the distance to the nearest collision, so only take one square root
+                self._sonars[i] = sqrt(min([origin.distance_sq(p) for _, p in collisions]))
 
     def draw(self, canvas):  # Draw the robot
         BaseRobot.draw(self, canvas)
         self.draw_sonars(canvas)
 
     def draw_sonars(self, canvas):  # Draw just the sonars
-        canvas.delete(self.tags + 'sonars')  # Deleting a nonexistent tag is safe, so always delete the sonar lines
         if not self._sonars:
             self.calc_sonars()
-        for dist, pose in zip(self._sonars, self.sonar_poses):
-            origin = pose.transform(self.pose).rotate(self.pose.point(), self.pose[2])
+        sonar_tags = self.tags + 'sonars'
+        delete_count = getattr(canvas, 'delete_count', None)
+        cached = self._sonar_lines
+        if cached is not None and cached[0] is canvas and cached[1] == delete_count:  # The lines are still valid
+            sonar_lines, fills = cached[2], cached[3]
+        else:
+            sonar_lines = canvas.find_withtag(sonar_tags)
+            if len(sonar_lines) == len(self.sonar_poses):
+                fills = [None]*len(sonar_lines)  # The last color each line was configured with, if known
+                self._sonar_lines = (canvas, delete_count, sonar_lines, fills)
+            else:  # If the sonar lines haven't all been drawn, redraw them
+                self._sonar_lines = None
+                canvas.delete(sonar_tags)  # Deleting a nonexistent tag is safe
+                sonar_lines = None
+        for i, (dist, origin) in enumerate(zip(self._sonars, self.sonar_origins())):
             fill = 'firebrick2' if dist > self.SONAR_MAX else 'gray'
-            sonar_ray = Ray(origin, dist, tags=self.tags+'sonars', fill=fill, width=1)
-            sonar_ray.draw(canvas)
+            if sonar_lines is None:
+                Ray(origin, dist, tags=sonar_tags, fill=fill, width=1).draw(canvas)
+            else:  # Otherwise move the existing lines, rather than deleting and recreating them every frame
+                x0, y0, theta = origin
+                canvas.coords(sonar_lines[i], canvas.remap_coords([x0, y0, x0+cos(theta)*dist, y0+sin(theta)*dist]))
+                if fills[i] != fill:  # Only reconfigure a line when its color changes
+                    canvas.itemconfigure(sonar_lines[i], fill=fill)
+                    fills[i] = fill
 
     def delete(self, canvas):  # TODO: Deprecate this in 2.0
         canvas.delete(self.tags, self.tags + 'sonars')  # Delete both the robot and sonar tags
+        self._canvas_poly = self._sonar_lines = None
 
     def check_if_collided(self):  # Check if the robot has collided, and set its collision flag accordingly
         if self.simulated:
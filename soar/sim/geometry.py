@@ -3,7 +3,7 @@
 #
 # soar/sim/geometry.py
 """ Geometry classes, for manipulating points, collections of points, lines, and normalizing angles. """
-from math import sin, cos, pi, sqrt, atan2
+from math import sin, cos, pi, sqrt, atan2, hypot
 
 
 def clip(value, m1, m2):
@@ -75,6 +75,8 @@ class Point:
         x (float): The x coordinate of the point.
         y (float): The y coordinate of the point.
     """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -83,7 +85,7 @@ class Point:
         return '(' + str(self.x) + ', ' + str(self.y) + ')'
 
     def __getitem__(self, val):  # This is so we can cheat and use xy tuples as 'other' inputs
-        return self.xy_tuple()[val]
+        return (self.x, self.y)[val]
 
     def xy_tuple(self):
         """ Returns: An `(x, y)` tuple representing the point. """
@@ -99,8 +101,9 @@ class Point:
         Returns:
             The endpoint of the scaled vector, as a `Point`.
         """
-        d_x, d_y = self.x-other[0], self.y-other[1]
-        return Point(d_x*value+other[0], d_y*value+other[1])
+        o_x, o_y = (other.x, other.y) if isinstance(other, Point) else (other[0], other[1])
+        d_x, d_y = self.x-o_x, self.y-o_y
+        return Point(d_x*value+o_x, d_y*value+o_y)
 
     def add(self, other):
         """ Vector addition; adds two points.
@@ -111,6 +114,8 @@ class Point:
         Returns:
             The `Point` that is the sum of this point and the argument.
         """
+        if isinstance(other, Point):  # Avoid indexing through __getitem__
+            return Point(self.x+other.x, self.y+other.y)
         return Point(self.x+other[0], self.y+other[1])
 
     def sub(self, other):
@@ -122,6 +127,8 @@ class Point:
         Returns:
             The `Point` that is the difference of this point and the argument.
         """
+        if isinstance(other, Point):  # Avoid indexing through __getitem__
+            return Point(self.x-other.x, self.y-other.y)
         return Point(self.x-other[0], self.y-other[1])
 
     def rotate(self, other, theta):
@@ -135,7 +142,7 @@ class Point:
             The rotated `Point`.
         """
         x, y = self.x, self.y
-        p_x, p_y = other[0], other[1]
+        p_x, p_y = (other.x, other.y) if isinstance(other, Point) else (other[0], other[1])
         c, s = cos(theta), sin(theta)
         return Point((x-p_x)*c-(y-p_y)*s+p_x, (x-p_x)*s+(y-p_y)*c+p_y)
 
@@ -148,7 +155,8 @@ class Point:
         Returns:
             A `Point` that is the midpoint of self and other.
         """
-        return Point((self.x+other[0])/2.0, (self.y+other[1])/2.0)
+        o_x, o_y = (other.x, other.y) if isinstance(other, Point) else (other[0], other[1])
+        return Point((self.x+o_x)/2.0, (self.y+o_y)/2.0)
 
     def distance(self, other):
         """ Calculate the distance between two points.
@@ -159,7 +167,24 @@ class Point:
         Returns:
             float: The Euclidean distance between the points.
         """
-        return sqrt(abs(self[0]-other[0])**2+abs(self[1]-other[1])**2)
+        if isinstance(other, Point):  # Avoid indexing through __getitem__
+            return hypot(self.x-other.x, self.y-other.y)
+        return hypot(self.x-other[0], self.y-other[1])
+
+    def distance_sq(self, other):
+        """ Calculate the squared distance between two points.
+
+        Cheaper than `distance` when only comparing distances, as no square root is taken.
+
+        Args:
+            other: An `(x, y)` tuple or an instance of `Point`.
+
+        Returns:
+            float: The square of the Euclidean distance between the points.
+        """
+        o_x, o_y = (other.x, other.y) if isinstance(other, Point) else (other[0], other[1])
+        d_x, d_y = self.x-o_x, self.y-o_y
+        return d_x*d_x+d_y*d_y
 
     def is_near(self, other, eps):
         """ Determine whether the distance between two points is within a certain value.
@@ -171,7 +196,7 @@ class Point:
         Returns:
             bool: `True` if the points are withing `eps` of each other, `False` otherwise.
         """
-        return self.distance(other) < eps
+        return self.distance_sq(other) < eps*eps
 
     def magnitude(self):
         """ The magnitude of this point interpreted as a vector.
@@ -179,7 +204,7 @@ class Point:
         Returns:
             float: The magnitude of the vector from the origin to this point.
         """
-        return sqrt(self[0]**2+self[1]**2)
+        return hypot(self.x, self.y)
 
     def angle_to(self, other):
         """ Return the angle between two points.
@@ -190,8 +215,9 @@ class Point:
         Returns:
             float: Angle in radians of the vector from self to other.
         """
-        d_x = other[0]-self[0]
-        d_y = other[1]-self[1]
+        o_x, o_y = (other.x, other.y) if isinstance(other, Point) else (other[0], other[1])
+        d_x = o_x-self.x
+        d_y = o_y-self.y
         return atan2(d_y, d_x)
 
     def copy(self):
@@ -209,6 +235,7 @@ class Pose(Point):
         y: The y coordinate of the pose.
         t: The angle between the direction the pose is facing and the positive x axis, in radians.
     """
+    __slots__ = ('t',)
 
     def __init__(self, x, y, t):
         Point.__init__(self, x, y)
@@ -218,7 +245,7 @@ class Pose(Point):
         return '(' + str(self.x) + ', ' + str(self.y) + ', ' + str(self.t) + ')'
 
     def __getitem__(self, val):  # This is so we can cheat and use xyt tuples as 'other' inputs
-        return self.xyt_tuple()[val]
+        return (self.x, self.y, self.t)[val]
 
     def xyt_tuple(self):
         """ Returns: An `(x, y, t)` tuple representing the pose. """
@@ -234,6 +261,8 @@ class Pose(Point):
              A new `Pose` equivalent to translating `self` by `(other[0], other[1])` and rotating by
              `other[2]`.
          """
+        if isinstance(other, Pose):  # Avoid indexing through __getitem__
+            return Pose(self.x+other.x, self.y+other.y, (self.t+other.t) % (2.0*pi))
         return Pose(self.x+other[0], self.y+other[1], (self.t+other[2]) % (2.0*pi))
 
     def rotate(self, pivot, theta):
@@ -258,7 +287,7 @@ class Pose(Point):
             bool: `True` if the distance between the point portions is within `dist_eps`, and the normalized difference
             between the angle portions is within `angle_eps`.
         """
-        return Point.is_near(self, other, dist_eps) and abs(normalize_angle_180(self[2]-other[2])) < angle_eps
+        return Point.is_near(self, other, dist_eps) and abs(normalize_angle_180(self.t-other[2])) < angle_eps
 
     def point(self):
         """ Strips the angle component of the pose and returns a point at the same position.
@@ -290,9 +319,13 @@ class PointCollection:
                 self.points.append(p)
             else:
                 self.points.append(Point(p[0], p[1]))
-        l = len(self.points)
-        if center is None:
-            self.center = Point(sum([t[0] for t in self.points])/l, sum([t[1] for t in self.points])/l)
+        if center is None:  # Find the centroid in a single pass over the points
+            s_x = s_y = 0
+            for p in self.points:
+                s_x += p.x
+                s_y += p.y
+            l = len(self.points)
+            self.center = Point(s_x/l, s_y/l)
         else:
             self.center = Point(*center)
 
@@ -312,7 +345,8 @@ class PointCollection:
             value (float): The scale amount.
             origin: An `(x, y)` tuple or `Point` from which the collection's points will move away/towards.
         """
-        self.points = [p.scale(value, origin) for p in self.points]
+        o_x, o_y = origin[0], origin[1]
+        self.points = [Point((p.x-o_x)*value+o_x, (p.y-o_y)*value+o_y) for p in self.points]
         self.center = self.center.scale(value, origin)
 
     def translate(self, delta):
@@ -321,7 +355,8 @@ class PointCollection:
         Args:
             delta: An `(x, y)` tuple or `Point`, treated as a vector and added to each point in the collection.
         """
-        self.points = [p.add(delta) for p in self.points]
+        d_x, d_y = delta[0], delta[1]
+        self.points = [Point(p.x+d_x, p.y+d_y) for p in self.points]
         self.center = self.center.add(delta)
 
     def rotate(self, pivot, theta):
@@ -331,17 +366,29 @@ class PointCollection:
             pivot: An `(x, y)` tuple or a `Point`.
             theta (float): The number of radians to rotate counterclockwise.
         """
-        self.points = [p.rotate(pivot, theta) for p in self.points]
+        p_x, p_y = pivot[0], pivot[1]
+        c, s = cos(theta), sin(theta)  # Computed once for the whole collection rather than once per point
+        self.points = [Point((p.x-p_x)*c-(p.y-p_y)*s+p_x, (p.x-p_x)*s+(p.y-p_y)*c+p_y) for p in self.points]
         self.center = self.center.rotate(pivot, theta)
 
-    def recenter(self, new_center):
-        """ Re-center the collection.
+    def recenter(self, new_center, theta=0.0):
+        """ Re-center the collection, optionally also rotating it about its new center.
+
+        Equivalent to recentering and then calling `rotate` with the new center as the pivot, but done in a single pass.
 
         Args:
             new_center: An `(x, y)` tuple or `Point` that will be the collection's new center.
+            theta (float, optional): The number of radians to rotate counterclockwise about the new center.
         """
-        diff = Point(new_center[0], new_center[1]).sub(self.center)
-        self.translate(diff)
+        n_x, n_y = new_center[0], new_center[1]
+        d_x, d_y = n_x-self.center.x, n_y-self.center.y
+        if theta:
+            c, s = cos(theta), sin(theta)
+            self.points = [Point((p.x+d_x-n_x)*c-(p.y+d_y-n_y)*s+n_x, (p.x+d_x-n_x)*s+(p.y+d_y-n_y)*c+n_y)
+                           for p in self.points]
+        else:
+            self.points = [Point(p.x+d_x, p.y+d_y) for p in self.points]
+        self.center = Point(n_x, n_y)  # The translated center is exactly the new center, and rotating doesn't move it
 
 
 class Line:
@@ -371,7 +418,7 @@ class Line:
             d_x = x1-x0
             d_y = y1-y0
             if normalize:
-                norm = sqrt(d_x**2+d_y**2)
+                norm = sqrt(d_x*d_x+d_y*d_y)
                 self.a = d_y/norm
                 self.b = -d_x/norm
             else:
@@ -432,6 +479,9 @@ class LineSegment(Line):
     """
     def __init__(self, p1, p2, eps=1e-8):
         Line.__init__(self, p1, p2, eps)
+        # The endpoints don't change, so find the segment's bounds once rather than on every has_point check
+        self._min_x, self._max_x = min(p1[0], p2[0]), max(p1[0], p2[0])
+        self._min_y, self._max_y = min(p1[1], p2[1]), max(p1[1], p2[1])
 
     def has_point(self, p, eps=1e-8):
         """ Determine whether a point lies on the line segment.
@@ -444,11 +494,10 @@ class LineSegment(Line):
         Returns:
             bool: `True` if the point is on the line segment, `False` otherwise.
         """
-        if not Line.has_point(self, p, eps):
-            return False
         x, y = p[0], p[1]
-        min_x, min_y = min(self.p1[0], self.p2[0]), min(self.p1[1], self.p2[1])
-        max_x, max_y = max(self.p1[0], self.p2[0]), max(self.p1[1], self.p2[1])
+        if not abs(self.a*x+self.b*y - self.c) < eps:  # The point isn't on the line at all
+            return False
+        min_x, min_y, max_x, max_y = self._min_x, self._min_y, self._max_x, self._max_y
         if abs(max_x-min_x) < eps:  # The line is vertical
             return abs(max_x-x) < eps and min_y <= y <= max_y
         elif abs(max_y - min_y) < eps:  # The line is horizontal
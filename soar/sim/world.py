@@ -170,7 +170,7 @@ class Polygon(PointCollection, WorldObject):
                 object will be drawn.
         """
         if not self.dummy:
-            flat_points = [p for pair in self.points for p in pair]
+            flat_points = [c for p in self.points for c in (p.x, p.y)]
             canvas.create_polygon(*flat_points, **self.options)
             self.do_draw = False
 
@@ -183,8 +183,9 @@ class Polygon(PointCollection, WorldObject):
         """
         if isinstance(other, Polygon):  # Might be able to do this better I suppose
             intersects = []
+            other_borders = other.borders  # Build the other polygon's borders once, rather than once per border
             for i in self.borders:
-                for j in other.borders:
+                for j in other_borders:
                     line_intersects = i.intersection(j, eps=eps)
                     if line_intersects:
                         intersects.extend(line_intersects)
@@ -279,6 +280,10 @@ class World:
         """ Iterating over a world is the same as iterating over the (sorted) object list. """
         return self.objects[item][0]
 
+    def __iter__(self):  # Iterate directly, rather than indexing through __getitem__ until an IndexError
+        for obj, layer in self.objects:
+            yield obj
+
     def add(self, obj, layer=None):
         """ Add an object to the world, with an optional layer specification.
 